@@ -21,11 +21,16 @@ SpectraTray（声谱托盘）
 """
 
 import os
+import contextlib
 import time
+import queue
 import threading
 import math
+import functools
+import inspect
 import warnings
 import webbrowser
+from collections import namedtuple
 import numpy as np
 import soundcard as sc
 from PIL import Image, ImageDraw
@@ -39,6 +44,35 @@ try:
     warnings.filterwarnings("ignore", category=SoundcardRuntimeWarning)
 except Exception:
     warnings.filterwarnings("ignore", message="data discontinuity in recording")
+# FFT 后端：优先用 scipy.fft（pocketfft，带 SIMD 向量化），没装 scipy 就退回 numpy.fft
+# nfft=2048 这种规模单线程就够了，多线程调度反而更慢
+# _rfft(x, out)：out 是可选的预分配输出缓冲区，后端支持时直接写进去
+# NumPy 2.0+ 的 np.fft.rfft 支持 out=
+try:
+    _NP_RFFT_HAS_OUT = "out" in inspect.signature(np.fft.rfft).parameters
+except (TypeError, ValueError):
+    _NP_RFFT_HAS_OUT = False
+try:
+    from scipy.fft import rfft as _scipy_rfft
+
+    def _rfft(x, out=None):
+        # scipy.fft 没有 out= 参数，结果总是新数组
+        return _scipy_rfft(x, overwrite_x=True, workers=1)
+except ImportError:
+    def _rfft(x, out=None):
+        if _NP_RFFT_HAS_OUT:
+            return np.fft.rfft(x, out=out)
+        return np.fft.rfft(x)
+# 可选：pyfftw（FFTW 通常是最快的 CPU FFT），装了就对固定长度预先做好计划
+try:
+    import pyfftw
+except ImportError:
+    pyfftw = None
+# 可选：numba，把“取统计量 -> 滤噪 -> 峰值跟踪 -> 归一化”融合成一个 JIT 内核
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 
 # =========================
@@ -71,6 +105,8 @@ BAND_COLORS = [
     ( 80, 170, 255),  # 蓝
     ( 70, 235, 255),  # 青
 ]
+# 频段统计方式 -> 整数编码（设置时换算好，worker 每帧只比较整数）
+BAND_STAT_CODES = {"max": 0, "rms": 1, "p90": 2}
 
 
 # =========================
@@ -81,6 +117,18 @@ def clamp(x, a, b):
     """把 x 限制在 [a, b]，防止出现越界值。"""
     return a if x < a else (b if x > b else x)
 
+def percentile90(seg):
+    """
+    等价于 np.percentile(seg, 90)（默认线性插值），但只用 np.partition 找两个相邻的顺序统计量。
+    频段切片通常只有几个到几百个 bin，np.percentile 的通用开销反而是大头。
+    """
+    n = seg.shape[0]
+    k = 0.9 * (n - 1)
+    lo = int(k)
+    hi = min(lo + 1, n - 1)
+    part = np.partition(seg, (lo, hi))
+    return float(part[lo] + (part[hi] - part[lo]) * (k - lo))
+
 def _parse_version(v: str):
     # "0.0.12" -> (0,0,12)；遇到非数字后缀就尽量取数字部分
     parts = []
@@ -161,9 +209,32 @@ def make_spectrum_icon(levels, max_level, bg_mode="black", size=ICON_SIZE):
         )
 
     # -------------------------
-    # 计算柱状布局
+    # 逐频段绘制：只画从底往上的 lv 个亮格
     # -------------------------
-    n_bands = len(levels)  # 频段数量（一般是 8）
+    boxes = icon_segment_boxes(len(levels), max_level, size)
+    for bi, bar in enumerate(boxes):
+        # 该频段对应的颜色（循环取色，避免越界）
+        col = BAND_COLORS[bi % len(BAND_COLORS)]
+        on = (col[0], col[1], col[2], 255)
+
+        # 当前频段亮几格（0..max_level）
+        lv = int(levels[bi])
+        lv = clamp(lv, 0, max_level)
+
+        # si=0 是底部第一格
+        for si in range(lv):
+            d.rectangle(bar[si], fill=on)
+
+    return img
+
+
+def icon_segment_boxes(n_bands, max_level, size=ICON_SIZE):
+    """
+    计算图标里每根柱子、每一格的矩形位置。
+
+    返回 boxes[bi][si] = [x0, y0, x1, y1]（PIL 矩形坐标，含端点），si=0 是底部第一格。
+    """
+    pad = 2                # 外边距（与背景圆角矩形一致）
     gap = 1                # 每根柱子之间的间隔（像素）
 
     # 每根柱子的宽度：根据画布宽度均分，至少 2px，避免太细
@@ -184,29 +255,67 @@ def make_spectrum_icon(levels, max_level, bg_mode="black", size=ICON_SIZE):
     # 每一格的高度（像素）：把总高度按 max_level 分成 max_level 段
     seg_h = max(1, (total_h - seg_gap * (max_level - 1)) // max_level)
 
-    # -------------------------
-    # 逐频段绘制
-    # -------------------------
+    boxes = []
     for bi in range(n_bands):
         # 该频段柱子的 x 坐标范围
         x0 = inner_l + bi * (bar_w + gap)
         x1 = min(x0 + bar_w, inner_r)
 
-        # 该频段对应的颜色（循环取色，避免越界）
-        col = BAND_COLORS[bi % len(BAND_COLORS)]
-        on = (col[0], col[1], col[2], 255)
-
-        # 当前频段亮几格（0..max_level）
-        lv = int(levels[bi])
-        lv = clamp(lv, 0, max_level)
-
-        # 只画亮的段：si=0 是底部第一格
-        for si in range(lv):
+        bar = []
+        for si in range(max_level):
             y1 = inner_b - si * (seg_h + seg_gap)
             y0 = y1 - seg_h
-            d.rectangle([x0, y0, x1, y1], fill=on)
+            bar.append([x0, y0, x1, y1])
+        boxes.append(bar)
+    return boxes
 
-    return img
+
+# 快速绘制用的模板缓存：(n_bands, max_level, bg_mode, size) -> (背景, 全亮, 每根柱子的像素范围)
+_ICON_TEMPLATES = {}
+
+def _icon_template(n_bands, max_level, bg_mode, size):
+    """
+    预渲染两张 RGBA 模板（numpy 数组）：全灭（只有背景）和全亮。
+    以及每根柱子第 si 格点亮时需要从“全亮”拷贝的行/列范围。
+    """
+    key = (n_bands, max_level, bg_mode, size)
+    tpl = _ICON_TEMPLATES.get(key)
+    if tpl is None:
+        off = np.array(make_spectrum_icon([0] * n_bands, max_level, bg_mode, size))
+        full = np.array(make_spectrum_icon([max_level] * n_bands, max_level, bg_mode, size))
+        spans = []
+        for bar in icon_segment_boxes(n_bands, max_level, size):
+            x0, _, x1, y_bottom = bar[0]
+            # tops[lv] = 亮 lv 格时最上面一格的 y0（lv=0 不用）
+            tops = [0] + [bar[si][1] for si in range(max_level)]
+            spans.append((x0, x1 + 1, y_bottom + 1, tops))
+        tpl = (off, full, spans)
+        _ICON_TEMPLATES[key] = tpl
+    return tpl
+
+def make_spectrum_icon_fast(levels, max_level, bg_mode="black", size=ICON_SIZE):
+    """
+    与 make_spectrum_icon 输出一致，但不走 PIL 的逐格 rectangle：
+
+    - 每种 (bg_mode, max_level) 预渲染一次“全灭/全亮”模板
+    - 每根柱子只做一次 numpy 切片拷贝：把“全亮”模板里底部 lv 格那一块贴到背景上
+    """
+    off, full, spans = _icon_template(len(levels), max_level, bg_mode, size)
+    arr = off.copy()
+    for (x0, x1, y_end, tops), lv in zip(spans, levels):
+        lv = clamp(int(lv), 0, max_level)
+        if lv > 0:
+            y0 = max(tops[lv], 0)
+            arr[y0:y_end, x0:x1] = full[y0:y_end, x0:x1]
+    return Image.fromarray(arr)
+
+@functools.lru_cache(maxsize=512)
+def _make_icon_cached(levels_tuple, max_level, bg_mode, size=ICON_SIZE):
+    """
+    make_spectrum_icon_fast 的记忆化版本：key 为 (levels 元组, max_level, bg_mode, size)。
+    实际播放时反复出现的档位组合并不多，命中后直接复用已生成的 Image。
+    """
+    return make_spectrum_icon_fast(levels_tuple, max_level, bg_mode, size)
 
 
 # =========================
@@ -215,7 +324,8 @@ def make_spectrum_icon(levels, max_level, bg_mode="black", size=ICON_SIZE):
 
 def build_band_bins(sr, nfft, n_bands=8, fmin=80.0, fmax=16000.0):
     """
-    对数分段，把 FFT 频率轴切成 n_bands 段，返回每段对应的 rfft bin 切片范围。
+    对数分段，把 FFT 频率轴切成 n_bands 段，返回每段对应的 rfft bin 切片范围，
+    以及“每个 bin 属于哪个频段”的编号数组。
 
     为什么用对数分段？
     - 人耳对频率的感知接近对数刻度（低频更敏感）
@@ -224,6 +334,9 @@ def build_band_bins(sr, nfft, n_bands=8, fmin=80.0, fmax=16000.0):
     返回值
     - bins: List[(a,b)]
         其中 a/b 是 rfft 结果数组的索引，表示可以用 mag_db[a:b] 取出该频段的能量。
+    - band_id: np.ndarray[int8]，长度同 rfft 结果
+        band_id[k] = 该 bin 所属频段编号，不属于任何频段为 -1；
+        配合 np.bincount 可以一次性算出所有频段的和。
     """
     # rfft 的频率轴（只包含 0..Nyquist）
     freqs = np.fft.rfftfreq(nfft, d=1.0 / sr)
@@ -232,6 +345,7 @@ def build_band_bins(sr, nfft, n_bands=8, fmin=80.0, fmax=16000.0):
     edges = np.logspace(math.log10(fmin), math.log10(fmax), n_bands + 1)
 
     bins = []
+    band_id = np.full(freqs.shape, -1, dtype=np.int8)
     for i in range(n_bands):
         lo, hi = edges[i], edges[i + 1]
 
@@ -243,7 +357,76 @@ def build_band_bins(sr, nfft, n_bands=8, fmin=80.0, fmax=16000.0):
         else:
             # b 用开区间，方便切片 mag_db[a:b]
             bins.append((int(idx[0]), int(idx[-1]) + 1))
-    return bins
+            band_id[idx[0]:idx[-1] + 1] = i
+    return bins, band_id
+
+# =========================
+# 频段档位内核（numba 可选）：一次遍历算完 8 个频段
+# =========================
+
+if njit is not None:
+    def _compute_levels_kernel(mag, band_starts, band_ends, stat_code, band_peak_db, peak_decay,
+                          db_range, max_level, denoise_on, noise_band_db, alpha_noise_power,
+                          gate_margin_db, out_levels):
+        """
+        numba 内核：直接在幅度谱 mag 上逐段取统计量，并完成滤噪、峰值跟踪、归一化。
+
+        - 不生成整段 dB 数组等中间临时量（max/rms 只对 8 个结果取 log）
+        - band_peak_db 原地更新，档位写进 out_levels（int32）
+        - stat_code 见 BAND_STAT_CODES：0=max, 1=rms, 2=p90
+        - alpha_noise_power 是预先算好的 denoise_alpha * 噪声功率（线性），每段直接相减
+        """
+        for i in range(band_starts.shape[0]):
+            a = band_starts[i]
+            b = band_ends[i]
+            if b <= a:
+                # 该频段没 bin，认为极小
+                band_db = -120.0
+            else:
+                if stat_code == 0:
+                    m = mag[a]
+                    for k in range(a + 1, b):
+                        if mag[k] > m:
+                            m = mag[k]
+                    band_db = 20.0 * math.log10(m + 1e-8)
+                elif stat_code == 1:
+                    acc = 0.0
+                    for k in range(a, b):
+                        acc += mag[k] * mag[k]
+                    band_db = 10.0 * math.log10(acc / (b - a) + 1e-16)
+                else:
+                    seg = np.empty(b - a, dtype=np.float32)
+                    for k in range(a, b):
+                        seg[k - a] = 20.0 * math.log10(mag[k] + 1e-8)
+                    band_db = np.percentile(seg, 90.0)
+
+                # 滤噪：功率域减法再回到 dB，低于噪声门直接压到极低
+                if denoise_on:
+                    P = 10.0 ** (band_db / 10.0)
+                    band_db = 10.0 * math.log10(max(P - alpha_noise_power[i], 1e-12))
+                    if band_db < noise_band_db[i] + gate_margin_db:
+                        band_db = -120.0
+
+            # 峰值跟踪 + 归一化
+            peak = max(band_db, band_peak_db[i] - peak_decay)
+            band_peak_db[i] = peak
+            t = (band_db - (peak - db_range)) / db_range
+            t = min(max(t, 0.0), 1.0)
+            lv = int(np.rint(t * max_level))
+            out_levels[i] = min(max(lv, 0), max_level)
+
+    # cache=True 在装饰阶段就要定位源码文件建缓存；打包后（PyInstaller 等）拿不到源码会直接抛错，
+    # 这时退回不带缓存的 JIT；再失败就彻底不用 numba
+    try:
+        compute_levels_nb = njit(cache=True, fastmath=True)(_compute_levels_kernel)
+    except Exception:
+        try:
+            compute_levels_nb = njit(fastmath=True)(_compute_levels_kernel)
+        except Exception:
+            compute_levels_nb = None
+else:
+    compute_levels_nb = None
+
 
 def pick_recording_source(prefer_names=("BlackHole", "Loopback", "VB-Audio", "Soundflower")):
     """
@@ -283,6 +466,12 @@ def pick_recording_source(prefer_names=("BlackHole", "Loopback", "VB-Audio", "So
 # 主类：托盘图标 + 菜单 + 后台音频采集线程
 # =========================
 
+# worker 每帧用到的设置快照：一次加锁全部读出，帧内不再反复抢锁
+FrameSettings = namedtuple(
+    "FrameSettings",
+    ["db_range", "bg_mode", "max_level", "stat_code", "denoise_on", "alpha_noise_power", "noise_band"],
+)
+
 class TraySpectrumMeter:
     def __init__(self, default_levels=10):
         # 线程同步锁：保护共享状态（菜单修改参数时与 worker 并发）
@@ -312,15 +501,71 @@ class TraySpectrumMeter:
 
         # 峰值跟踪衰减（dB/帧）：决定“峰值参考线”下降速度
         # 值越小：峰值下降越慢 -> 不容易一直顶满（更稳）
-        self.peak_decay_db = 0.06
+        # 帧间隔是 hop / samplerate（约 21ms），0.015 dB/帧 ≈ 0.7 dB/秒
+        self.peak_decay_db = 0.015
 
         # -------------------------
         # 音频/频谱参数
         # -------------------------
         self.n_bands = 8
-        self.nfft = 4096        # FFT 点数：越大频率分辨率越高，但刷新更慢
+        self.nfft = 2048        # FFT 点数：越大频率分辨率越高，但刷新更慢
+        self.hop = self.nfft // 2  # 帧移：50% 重叠，每录 hop 个采样就做一次 nfft 点 FFT
         self.samplerate = 48000 # 采样率
 
+        # 静音门限：一帧的能量 sum(x*x) 低于它就认为没在放声音，跳过 FFT
+        # 系统回放暂停时 loopback 录到的基本是数字静音，固定门限就够用
+        self.silence_energy = 1e-8 * self.nfft
+        self._silent_band_db = np.full(self.n_bands, -120.0, dtype=np.float32)
+
+        # 预计算频段切片范围，以及向量化归约（reduceat）需要的起点/长度
+        # 对数分段的各频段在 bin 轴上首尾相接，所以只对非空频段做 reduceat 即可
+        self._bins, self._band_id = build_band_bins(self.samplerate, self.nfft, n_bands=self.n_bands)
+        self._band_starts = np.array([a for a, b in self._bins], dtype=np.intp)
+        self._band_lens = np.array([b - a for a, b in self._bins], dtype=np.intp)
+        self._band_ends = self._band_starts + self._band_lens
+        self._band_nonempty = self._band_lens > 0
+        self._band_lo = int(self._band_starts[self._band_nonempty].min()) if self._band_nonempty.any() else 0
+        self._band_hi = max(b for a, b in self._bins)
+        # 真正用到的 bin 只有 [lo, hi) 这一段连续区间（80Hz 以下、16kHz 以上都不碰），
+        # 区间内每个 bin 都属于某个频段，所以直接切片就能拿到，不需要 gather 索引
+        # bincount 用：区间内各 bin 的频段编号、每段 bin 数、功率缓冲区（只算/分配一次）
+        self._used_band = self._band_id[self._band_lo:self._band_hi]
+        self._band_counts = np.bincount(self._used_band, minlength=self.n_bands)
+        self._buf_power = np.empty(self._band_hi - self._band_lo, dtype=np.float32)
+
+        # 汉宁窗：减少频谱泄漏（让频谱更干净）；只生成一次，worker 里原地相乘
+        self._window = np.hanning(self.nfft).astype(np.float32)
+        # 每帧复用的 scratch 缓冲区：稳态下每帧基本不再分配新数组
+        # _frame: 分析窗口（最近 nfft 个单声道采样，每帧滑动 hop）；_buf_x: 加窗后的时域帧
+        # _buf_X: 复数频谱；_buf_mag: 幅度谱；_buf_mag_db: dB 谱
+        n_rfft = self.nfft // 2 + 1
+        self._frame = np.zeros(self.nfft, dtype=np.float32)
+        # 上一次滑进 _frame 的采集序号；序号不连续说明中间丢过帧，窗口要重新填
+        self._capture_seq = -1
+        self._buf_x = np.empty(self.nfft, dtype=np.float32)
+        self._buf_X = np.empty(n_rfft, dtype=np.complex64)
+        self._buf_mag = np.empty(n_rfft, dtype=np.float32)
+        self._buf_mag_db = np.empty_like(self._buf_mag)
+
+        # pyfftw：FFT 长度固定不变，启动时做一次 FFTW_MEASURE 计划，后面每帧直接执行
+        # 输入/输出都是计划自带的对齐缓冲区；不可用时为 None，退回 _rfft
+        self._fft = None
+        if pyfftw is not None:
+            try:
+                self._fft_in = pyfftw.empty_aligned(self.nfft, dtype="float32")
+                self._fft_out = pyfftw.empty_aligned(self.nfft // 2 + 1, dtype="complex64")
+                self._fft = pyfftw.FFTW(
+                    self._fft_in, self._fft_out,
+                    flags=("FFTW_MEASURE", "FFTW_DESTROY_INPUT"),
+                    threads=1,
+                )
+            except Exception:
+                self._fft = None
+
+        # numba 内核是否可用（调用时若 JIT 编译失败，会自动退回 NumPy 路径）
+        self._use_numba = compute_levels_nb is not None
+        self._levels_buf = np.zeros(self.n_bands, dtype=np.int32)
+
         # -------------------------
         # 双击判定参数
         # -------------------------
@@ -329,6 +574,14 @@ class TraySpectrumMeter:
         self._last_primary_click = 0.0
         self._double_click_gap = 0.35  # 两次点击间隔阈值（秒）
 
+        # -------------------------
+        # 托盘图标刷新限速
+        # -------------------------
+        # update_icon() 每次都要走一趟系统托盘（Windows 下是 Shell_NotifyIconW），
+        # 不管 FFT 帧率多高，图标最多刷新 30 次/秒
+        self.icon_min_interval = 1.0 / 30.0
+        self._last_icon_update = 0.0
+
         # --------- 杂音滤除（仅影响显示）---------
         self.denoise_enabled = False
         self.denoise_strength_choices = [("弱", 0.8), ("中", 1.2), ("强", 1.8)]
@@ -336,6 +589,8 @@ class TraySpectrumMeter:
         self._learn_noise = threading.Event()   # 触发学习噪声画像
         self._noise_profile = None              # np.ndarray, 线性幅度谱（rfft 长度）
         self._noise_band_db = None              # shape: (n_bands,)
+        self._noise_band_power = None           # 噪声底的线性功率 10**(dB/10)，学习完成时算一次
+        self._alpha_noise_power = None          # denoise_alpha * _noise_band_power，改强度时重算
         self.denoise_gate_margin_db = 0.0         # 噪声门
         # --------- 频段统计方式（Max / RMS / P90）---------
         self.band_stat_choices = [
@@ -344,6 +599,7 @@ class TraySpectrumMeter:
             ("分位数 P90 (抗尖峰)", "p90"),
         ]
         self.band_stat = "rms"  # 默认 RMS
+        self._band_stat_code = BAND_STAT_CODES[self.band_stat]
 
         # -------------------------
         # 输入源选择（右键菜单可切换）
@@ -363,7 +619,7 @@ class TraySpectrumMeter:
         # -------------------------
         self.icon = pystray.Icon(
             name=APP_NAME_EN,
-            icon=make_spectrum_icon([0] * self.n_bands, self.get_max_level(), self.get_bg_mode(), ICON_SIZE),
+            icon=make_spectrum_icon_fast([0] * self.n_bands, self.get_max_level(), self.get_bg_mode(), ICON_SIZE),
             title=f"{APP_NAME} v{__version__}",
             menu=self._build_menu(),
         )
@@ -410,7 +666,10 @@ class TraySpectrumMeter:
             return float(self.denoise_alpha)
 
     def _set_denoise_alpha(self, a):
-        with self._lock: self.denoise_alpha = float(a)
+        with self._lock:
+            self.denoise_alpha = float(a)
+            if self._noise_band_power is not None:
+                self._alpha_noise_power = self.denoise_alpha * self._noise_band_power
         self._force_redraw.set()
 
     def get_band_stat(self):
@@ -418,10 +677,26 @@ class TraySpectrumMeter:
             return str(self.band_stat)
 
     def _set_band_stat(self, mode):
+        # 在设置时完成校验与编码，未知模式直接抛 KeyError
+        code = BAND_STAT_CODES[str(mode)]
         with self._lock:
             self.band_stat = str(mode)
+            self._band_stat_code = code
         self._force_redraw.set()
 
+    def _snapshot(self):
+        """一次加锁读出 worker 每帧需要的全部设置（线程安全），返回 FrameSettings。"""
+        with self._lock:
+            return FrameSettings(
+                db_range=float(self.db_range),
+                bg_mode=self.bg_mode,
+                max_level=self.max_level,
+                stat_code=self._band_stat_code,
+                denoise_on=bool(self.denoise_enabled),
+                alpha_noise_power=self._alpha_noise_power,
+                noise_band=self._noise_band_db,
+            )
+
     # ---------- 输入源选择----------
     def get_input_source_key(self):
         """读取当前输入源 key（线程安全）。"""
@@ -519,6 +794,170 @@ class TraySpectrumMeter:
         return sc.default_microphone(), "默认麦克风", "未知输入源，已退回默认麦克风"
 
 
+    # ---------- 频谱计算 ----------
+
+    def _downmix(self, data):
+        """
+        录音数据 (hop, channels) -> 单声道，滑进分析窗口 self._frame，返回整个窗口（nfft 点）。
+
+        - 50% 重叠：窗口前半段换成上一次的后半段，新录到的 hop 个采样写进末尾
+        - 单声道录音：直接拷贝
+        - 双声道录音：0.5 * (L + R)，用 out= 原地计算，不做 axis=1 归约
+        """
+        frame = self._frame
+        hop = self.hop
+        frame[:-hop] = frame[hop:]
+        tail = frame[-hop:]
+        if data.shape[1] == 1:
+            np.copyto(tail, data[:, 0], casting="same_kind")
+        else:
+            np.add(data[:, 0], data[:, 1], out=tail)
+            tail *= 0.5
+        return frame
+
+    def _spectrum(self, x):
+        """
+        加窗 -> rfft -> 取模，结果写进 self._buf_mag 并返回。
+
+        - 有 pyfftw 计划：窗函数直接乘进计划的对齐输入缓冲区，再执行计划
+        - 否则：加窗结果写进 self._buf_x 再走 _rfft（scipy.fft / numpy.fft），后端支持时输出写进 self._buf_X
+        x 本身不会被修改（它是下一帧还要复用一半的分析窗口）。
+        """
+        if self._fft is not None:
+            np.multiply(x, self._window, out=self._fft_in)
+            self._fft()
+            X = self._fft_out
+        else:
+            np.multiply(x, self._window, out=self._buf_x)
+            X = _rfft(self._buf_x, out=self._buf_X)
+        return np.abs(X, out=self._buf_mag)
+
+    def _mag_to_db(self, mag, lo=0, hi=None, out=None):
+        """
+        幅度 -> dB：20*log10(A)，只算 [lo, hi) 这一段并返回。
+        结果默认写进 self._buf_mag_db 的对应位置，也可以通过 out 指定（长度需为 hi-lo）。
+
+        全程原地计算：用 max(A, 1e-8) 代替 A + 1e-8 防止 log(0)，不产生临时数组
+        """
+        if out is None:
+            out = self._buf_mag_db[lo:hi]
+        np.maximum(mag[lo:hi], np.float32(1e-8), out=out)
+        np.log10(out, out=out)
+        out *= 20.0
+        return out
+
+    # ---------- 频段统计（向量化）----------
+
+    def _reduce_bands(self, mag, stat_code):
+        """
+        一次算出所有频段的 band_db，代替逐频段调用 np.max / np.percentile / np.mean。
+
+        stat_code 见 BAND_STAT_CODES：
+        - max: 对幅度 mag 做 np.maximum.reduceat，只对 8 个结果取 log（log 单调，结果不变）
+        - rms: 功率 mag*mag 按 band_id 做 np.bincount 一次求出各段之和，再直接换算 dB
+          （不再 dB -> 幅度 -> dB 来回转）
+        - p90: 只有这一种需要整段 dB，每段用 percentile90（np.partition）求分位数
+        空频段返回 -120 dB。
+        """
+        band_db = np.full(self.n_bands, -120.0, dtype=np.float32)
+        ne = self._band_nonempty
+        if not ne.any():
+            return band_db
+
+        # 非空频段首尾相接：只截取 [lo, hi) 这一段做 reduceat
+        lo, hi = self._band_lo, self._band_hi
+        starts = self._band_starts[ne] - lo
+
+        if stat_code == 0:  # max
+            peaks = np.maximum.reduceat(mag[lo:hi], starts)
+            band_db[ne] = 20.0 * np.log10(peaks + 1e-8)
+        elif stat_code == 1:  # rms
+            seg = mag[lo:hi]
+            power = np.multiply(seg, seg, out=self._buf_power)
+            sums = np.bincount(self._used_band, weights=power, minlength=self.n_bands)
+            # +1e-16 对应 20*log10(mag+1e-8) 的下限（-160 dB）
+            band_db[ne] = 10.0 * np.log10(sums[ne] / self._band_counts[ne] + 1e-16)
+        else:  # p90
+            # 转换到 dB：20*log10(A)
+            mag_db = self._mag_to_db(mag, lo, hi)
+            for i in np.flatnonzero(ne):
+                a = self._band_starts[i] - lo
+                band_db[i] = percentile90(mag_db[a:a + self._band_lens[i]])
+        return band_db
+
+    def _compute_levels(self, mag, band_peak_db, settings):
+        """
+        幅度谱 -> 每个频段的档位（0..max_level），并原地更新峰值跟踪 band_peak_db。
+
+        settings 是本帧的 FrameSettings 快照。
+        有 numba 就走融合内核 compute_levels_nb；否则用 NumPy 向量化统计 + 向量化归一化。
+        """
+        db_range = settings.db_range
+        max_level = settings.max_level
+        nb = settings.noise_band
+        denoise_on = settings.denoise_on and nb is not None
+
+        if self._use_numba:
+            try:
+                compute_levels_nb(
+                    mag, self._band_starts, self._band_ends, settings.stat_code,
+                    band_peak_db, self.peak_decay_db, db_range, max_level,
+                    denoise_on, nb if denoise_on else band_peak_db,
+                    settings.alpha_noise_power if denoise_on else band_peak_db,
+                    self.denoise_gate_margin_db, self._levels_buf,
+                )
+                return self._levels_buf.tolist()
+            except Exception:
+                # JIT 编译失败（例如参数类型不被支持）：退回 NumPy 路径
+                self._use_numba = False
+
+        band_dbs = self._reduce_bands(mag, settings.stat_code)
+        return self._levels_from_band_db(band_dbs, band_peak_db, settings, denoise_on)
+
+    def _warmup_numba(self):
+        """
+        预热 numba 内核：用和真实帧相同 dtype 的假数据先调用一次，把 JIT 编译挪到打开录音器之前。
+
+        冷缓存时编译要好几秒；放在第一帧里做会卡住图标、采集队列也会一直丢帧。
+        编译失败时 _compute_levels 会把 _use_numba 关掉，之后每帧都直接走 NumPy 路径。
+        """
+        if not self._use_numba:
+            return
+        mag = np.zeros_like(self._buf_mag)
+        band_peak_db = np.full(self.n_bands, -30.0, dtype=np.float32)
+        self._compute_levels(mag, band_peak_db, self._snapshot())
+
+    def _levels_from_band_db(self, band_dbs, band_peak_db, settings, denoise_on):
+        """
+        已有每段 band_db 时的后半段：滤噪（可选）-> 峰值跟踪 -> 归一化到 0..max_level。
+        NumPy 路径和静音帧共用；8 个频段整体做向量运算，没有逐段 Python 循环。
+        """
+        db_range = settings.db_range
+        max_level = settings.max_level
+        band_db = band_dbs.astype(np.float64)
+
+        # 应用滤噪：每段做“功率域减法”再回到 dB（空频段不处理）
+        if denoise_on:
+            P = np.power(10.0, band_db / 10.0)
+            clean_db = 10.0 * np.log10(np.maximum(P - settings.alpha_noise_power, 1e-12))
+            # 低于噪声门直接压到极低，柱子就不亮
+            gate = settings.noise_band.astype(np.float64) + self.denoise_gate_margin_db
+            clean_db[clean_db < gate] = -120.0
+            band_db = np.where(self._band_nonempty, clean_db, band_db)
+
+        # 峰值跟踪：峰值逐渐下降，但遇到更高值会立刻抬升
+        np.maximum(band_db, band_peak_db - self.peak_decay_db, out=band_peak_db)
+
+        # 归一化
+        floor = band_peak_db - db_range
+        t = (band_db - floor) / db_range
+        np.clip(t, 0.0, 1.0, out=t)
+
+        # 0..1 映射为 0..max_level
+        levels = np.rint(t * max_level).astype(np.int32)
+        np.clip(levels, 0, max_level, out=levels)
+        return levels.tolist()
+
     # ---------- 打开网站 / 双击逻辑 ----------
 
     def _open_website(self):
@@ -695,25 +1134,84 @@ class TraySpectrumMeter:
 
     # ---------- 后台线程：采集音频并更新频谱 ----------
 
+    def _capture_loop(self, rec, frames, stop_capture):
+        """
+        采集线程（生产者）：循环 rec.record(hop)，把 (序号, 数据) 放进 frames 队列。
+
+        - 录音和 DSP 分在两个线程，DSP 偶尔变慢也不会让声卡读取断流
+        - 队列满时丢掉最旧的一帧，保证显示延迟有上限；序号照常递增，worker 据此发现断档
+        - 录音出错时把异常放进队列，交给 worker 走原来的重试逻辑
+        """
+        hop = self.hop
+        seq = 0
+        while not (self._stop.is_set() or stop_capture.is_set()):
+            try:
+                data = rec.record(numframes=hop)
+            except Exception as e:
+                data = e
+            else:
+                if data is None or len(data) != hop:
+                    continue
+                data = (seq, data)
+                seq += 1
+
+            while True:
+                try:
+                    frames.put_nowait(data)
+                    break
+                except queue.Full:
+                    try:
+                        frames.get_nowait()
+                    except queue.Empty:
+                        pass
+
+            if isinstance(data, Exception):
+                return
+
+    def _next_frame(self, frames):
+        """
+        worker 从采集队列取一帧。
+
+        - 超时返回 None，方便及时响应退出/切换输入源
+        - 采集线程出错时在这里重新抛出
+        - 序号不连续（采集线程丢过帧）也返回 None：50% 重叠时旧窗口和这一帧在时间上并不相邻，
+          硬拼进同一个 FFT 会出现全频段“炸一下”。先清空窗口、用这一帧重新填后半段，下一帧再出频谱
+        """
+        try:
+            item = frames.get(timeout=0.5)
+        except queue.Empty:
+            return None
+        if isinstance(item, Exception):
+            raise item
+        seq, data = item
+        gap = seq != self._capture_seq + 1
+        self._capture_seq = seq
+        if gap:
+            self._frame.fill(0.0)
+            self._downmix(data)
+            return None
+        return data
+
     def _worker(self):
         """
         后台线程主循环：
 
         1) 根据右键菜单选择的“输入源”打开录音器（默认：默认麦克风）
            - Windows 额外支持“系统输出（默认扬声器 Loopback）”
-        2) 每次读 nfft 帧 -> 窗函数 -> rfft -> 幅度 -> 转 dB
+        2) 采集线程每次读 hop 帧放进队列；本线程取出后滑进 nfft 点分析窗口（50% 重叠）
+           -> 窗函数 -> rfft -> 幅度 -> 转 dB
         3) 按频段 bins 切片，按统计方式（Max/RMS/P90）计算每段 band_db
         4) 峰值跟踪 + 动态范围(db_range) 归一化 -> 0..max_level
         5) 若参数/levels 变化则重绘托盘图标
         """
         sr = self.samplerate
-        nfft = self.nfft
+        hop = self.hop
 
-        # 预计算频段切片范围
-        bins = build_band_bins(sr, nfft, n_bands=self.n_bands)
+        # 频段切片范围（在 __init__ 里预计算）
+        bins = self._bins
 
-        # 汉宁窗：减少频谱泄漏（让频谱更干净）
-        window = np.hanning(nfft).astype(np.float32)
+        # 打开录音器之前先把 numba 内核编译好，真实帧不再承担 JIT 编译
+        self._warmup_numba()
 
         # 录音器外层循环：支持右键菜单切换输入源
         while not self._stop.is_set():
@@ -735,146 +1233,137 @@ class TraySpectrumMeter:
             except Exception:
                 pass
 
-            # 每次切换输入源都重置峰值跟踪
+            # 每次切换输入源都重置峰值跟踪和分析窗口（新的采集线程序号从 0 开始）
             band_peak_db = np.full(self.n_bands, -30.0, dtype=np.float32)
+            self._frame.fill(0.0)
+            self._capture_seq = -1
 
             # 清除切换标志，准备打开录音器
             self._restart_audio.clear()
 
-            # 打开录音器（双声道录制，后面会混成 mono）
+            # 打开录音器：优先直接录单声道（省掉一半数据量和下混）；设备不支持再退回双声道
             try:
-                with mic.recorder(samplerate=sr, channels=2) as rec:
-                    # 用于“变化检测”，避免每帧都更新图标（省 CPU）
-                    last_levels = None
-                    last_db_range = None
-                    last_bg_mode = None
-                    last_stat_mode = None
-
-                    while not self._stop.is_set():
-                        # 输入源切换：跳出当前录音器，外层会重新打开
-                        if self._restart_audio.is_set():
-                            self._restart_audio.clear()
-                            break
-
-                        # 阻塞读取 nfft 帧（刷新间隔约为 nfft / sr）
-                        data = rec.record(numframes=nfft)
-                        if data is None or data.size == 0:
-                            continue
-
-                        # 双声道 -> 单声道（取平均）
-                        x = data.mean(axis=1).astype(np.float32)
-
-                        # FFT：只计算正频率部分（rfft）
-                        X = np.fft.rfft(x * window)
-
-                        # 幅度谱（取复数模）
-                        mag = np.abs(X).astype(np.float32)
-
-                        # ---------- 学习噪声画像 ----------
-                        if self._learn_noise.is_set():
-                            self._learn_noise.clear()
-                            learn_frames = max(12, int(3 * sr / nfft))
-                            buf = []
-                            for _ in range(learn_frames):
-                                if self._stop.is_set() or self._restart_audio.is_set():
-                                    break
-                                data2 = rec.record(numframes=nfft)
-                                if data2 is None or data2.size == 0:
-                                    continue
-                                x2 = data2.mean(axis=1).astype(np.float32)
-                                X2 = np.fft.rfft(x2 * window)
-                                mag2 = np.abs(X2).astype(np.float32)
-                                mag2_db = 20.0 * np.log10(mag2 + 1e-8)
-                                band_db_list = []
-                                for (a, b) in bins:
-                                    if b <= a:
-                                        band_db_list.append(-120.0)
-                                    else:
-                                        # 用 percentile 代替 max，抗“偶发尖峰”
-                                        band_db_list.append(float(np.percentile(mag2_db[a:b], 90)))
-                                buf.append(band_db_list)
-                            if buf:
-                                noise_band = np.median(np.array(buf, dtype=np.float32), axis=0)  # 每段中位数作为噪声底
-                                with self._lock:
-                                    self._noise_band_db = noise_band
-                                self._force_redraw.set()
-
-                        # 转换到 dB：20*log10(A)
-                        mag_db = 20.0 * np.log10(mag + 1e-8)
-
-                        # 读取当前设置
-                        db_range = self.get_db_range()
-                        bg_mode = self.get_bg_mode()
-                        max_level = self.get_max_level()
-                        stat_mode = self.get_band_stat()
-
-                        # 计算 8 个频段的档位
-                        levels = []
-                        for i, (a, b) in enumerate(bins):
-                            if b <= a:
-                                # 该频段没 bin，认为极小
-                                band_db = -120.0
-                            else:
-                                seg = mag_db[a:b]
-                                # 取统计量
-                                if stat_mode == "max":
-                                    band_db = float(np.max(seg))
-                                elif stat_mode == "p90":
-                                    band_db = float(np.percentile(seg, 90))
-                                elif stat_mode == "rms":
-                                    amp = 10.0 ** (seg / 20.0)
-                                    band_db = float(20.0 * np.log10(np.sqrt(np.mean(amp * amp)) + 1e-12))
-                                else:
-                                    raise ValueError(f"Unknown stat mode: {stat_mode}")
-
-                                # 应用滤噪：每段做“功率域减法”再回到 dB
-                                if self.get_denoise_enabled():
+                with contextlib.ExitStack() as stack:
+                    try:
+                        rec = stack.enter_context(mic.recorder(samplerate=sr, channels=1))
+                    except Exception:
+                        rec = stack.enter_context(mic.recorder(samplerate=sr, channels=2))
+                    # 采集线程（生产者）往 frames 里放数据，本线程只做 DSP（消费者）
+                    frames = queue.Queue(maxsize=2)
+                    stop_capture = threading.Event()
+                    producer = threading.Thread(
+                        target=self._capture_loop, args=(rec, frames, stop_capture), daemon=True
+                    )
+                    producer.start()
+                    try:
+                        # 用于“变化检测”，避免每帧都更新图标（省 CPU）
+                        last_levels = None
+                        last_db_range = None
+                        last_bg_mode = None
+                        last_stat_code = None
+
+                        while not self._stop.is_set():
+                            # 输入源切换：跳出当前录音器，外层会重新打开
+                            if self._restart_audio.is_set():
+                                self._restart_audio.clear()
+                                break
+
+                            # 取采集线程录好的 hop 帧（刷新间隔约为 hop / sr）
+                            data = self._next_frame(frames)
+                            if data is None:
+                                continue
+
+                            # 下混成单声道并滑进分析窗口（直接写进预分配的 float32 缓冲区）
+                            x = self._downmix(data)
+
+                            # ---------- 学习噪声画像 ----------
+                            if self._learn_noise.is_set():
+                                self._learn_noise.clear()
+                                learn_frames = max(12, int(3 * sr / hop))
+                                # 每行是一帧在频段范围 [lo, hi) 内的 dB 谱，录完后再统一统计
+                                lo, hi = self._band_lo, self._band_hi
+                                learn_db = np.empty((learn_frames, hi - lo), dtype=np.float32)
+                                n_learned = 0
+                                for _ in range(learn_frames):
+                                    if self._stop.is_set() or self._restart_audio.is_set():
+                                        break
+                                    data2 = self._next_frame(frames)
+                                    if data2 is None:
+                                        continue
+                                    # 与主路径相同：下混、频谱、dB 都写进同一组预分配缓冲区
+                                    x2 = self._downmix(data2)
+                                    mag2 = self._spectrum(x2)
+                                    self._mag_to_db(mag2, lo, hi, out=learn_db[n_learned])
+                                    n_learned += 1
+                                if n_learned:
+                                    noise_band = np.full(self.n_bands, -120.0, dtype=np.float32)
+                                    for i, (a, b) in enumerate(bins):
+                                        if b > a:
+                                            # 每帧取该段 P90（抗“偶发尖峰”），一次 percentile 算完所有帧；
+                                            # 再取各帧的中位数作为噪声底
+                                            p90 = np.percentile(learn_db[:n_learned, a - lo:b - lo], 90, axis=1)
+                                            noise_band[i] = np.median(p90)
+                                    # 噪声功率只在学习完成时换算一次，每帧不再重复做 10**(dB/10)
+                                    noise_power = np.power(10.0, noise_band / 10.0).astype(np.float32)
                                     with self._lock:
-                                        nb = self._noise_band_db
-                                    if nb is not None:
-                                        alpha = self.get_denoise_alpha()
-                                        P = 10.0 ** (band_db / 10.0)
-                                        N = 10.0 ** (float(nb[i]) / 10.0)
-                                        Pclean = max(P - alpha * N, 1e-12)
-                                        band_db = 10.0 * math.log10(Pclean)
-                                        if band_db < float(nb[i]) + self.denoise_gate_margin_db:
-                                            band_db = -120.0  # 直接压到极低，柱子就不亮
-
-                            # 峰值跟踪：峰值逐渐下降，但遇到更高值会立刻抬升
-                            band_peak_db[i] = max(band_db, band_peak_db[i] - self.peak_decay_db)
-
-                            # 归一化
-                            floor = float(band_peak_db[i] - db_range)
-                            t = (band_db - floor) / db_range
-                            t = clamp(t, 0.0, 1.0)
-
-                            # 0..1 映射为 0..max_level
-                            lv = int(round(t * max_level))
-                            levels.append(clamp(lv, 0, max_level))
-
-                        # 菜单改动后强制重绘
-                        if self._force_redraw.is_set():
-                            last_levels = None
-                            last_db_range = None
-                            last_bg_mode = None
-                            last_stat_mode = None
-                            self._force_redraw.clear()
-
-                        # 仅当显示内容变化时更新托盘图标
-                        if  (levels != last_levels) or \
-                            (db_range != last_db_range) or \
-                            (bg_mode != last_bg_mode) or \
-                            (stat_mode != last_stat_mode):
-                            self.icon.icon = make_spectrum_icon(levels, max_level, bg_mode, ICON_SIZE)
-                            try:
-                                self.icon.update_icon()
-                            except Exception:
-                                pass
-
-                            last_levels = list(levels)
-                            last_db_range = db_range
-                            last_bg_mode = bg_mode
-                            last_stat_mode = stat_mode
+                                        self._noise_band_db = noise_band
+                                        self._noise_band_power = noise_power
+                                        self._alpha_noise_power = self.denoise_alpha * noise_power
+                                    self._force_redraw.set()
+                                # 学习过程复用了同一组缓冲区，本帧不再显示，直接进入下一帧
+                                continue
+
+                            # 读取当前设置（一次加锁拿到整帧的快照）
+                            settings = self._snapshot()
+                            db_range = settings.db_range
+                            bg_mode = settings.bg_mode
+                            max_level = settings.max_level
+                            stat_code = settings.stat_code
+
+                            if float(np.dot(x, x)) < self.silence_energy:
+                                # 静音帧：不做 FFT，所有频段按 -120 dB 走峰值衰减 + 归一化
+                                levels = self._levels_from_band_db(
+                                    self._silent_band_db, band_peak_db, settings, False
+                                )
+                            else:
+                                # 加窗 + FFT（只算正频率部分）+ 取模，写进预分配的缓冲区
+                                mag = self._spectrum(x)
+
+                                # 计算 8 个频段的档位
+                                levels = self._compute_levels(mag, band_peak_db, settings)
+
+                            # 菜单改动后强制重绘
+                            if self._force_redraw.is_set():
+                                last_levels = None
+                                last_db_range = None
+                                last_bg_mode = None
+                                last_stat_code = None
+                                self._force_redraw.clear()
+
+                            # 仅当显示内容变化时更新托盘图标；并限制最高刷新率
+                            # 距上次刷新不足 icon_min_interval 时先跳过：last_* 不更新，
+                            # 下一帧若内容仍不同会自动补画
+                            now = time.monotonic()
+                            if ((levels != last_levels) or
+                                (db_range != last_db_range) or
+                                (bg_mode != last_bg_mode) or
+                                (stat_code != last_stat_code)) and \
+                                (now - self._last_icon_update >= self.icon_min_interval):
+                                self.icon.icon = _make_icon_cached(tuple(levels), max_level, bg_mode, ICON_SIZE)
+                                try:
+                                    self.icon.update_icon()
+                                except Exception:
+                                    pass
+
+                                self._last_icon_update = now
+                                last_levels = list(levels)
+                                last_db_range = db_range
+                                last_bg_mode = bg_mode
+                                last_stat_code = stat_code
+                    finally:
+                        # 先停掉采集线程，再让 with 关闭录音器
+                        stop_capture.set()
+                        producer.join(timeout=1.0)
 
             except Exception:
                 # 设备被占用/无权限/切换瞬间可能会失败：稍等后重试